@@ -1,13 +1,25 @@
+from __future__ import annotations
+
 import typing
 import json
+import ast
+import functools
+import collections
+import gc
+import multiprocessing
 import sys
+import types
 import os
-import inspect
 import importlib.util
 from pathlib import Path
-from pydantic import BaseModel
-from pydantic.fields import FieldInfo
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import time
+from io import StringIO
+
+# pydantic 體積較大，延遲到確認有 Schema 需要處理時才導入 (見 _ensure_pydantic)
+if typing.TYPE_CHECKING:
+    from pydantic import BaseModel
+    from pydantic.fields import FieldInfo
 
 # --- 配置區 (Configuration) ---
 
@@ -17,6 +29,28 @@ SCHEMA_SOURCE_DIR = Path("./schemas")
 # 目標文件夾：Godot 腳本輸出的根目錄
 GODOT_OUTPUT_DIR = Path("./godot_project/generated")
 
+# 增量緩存清單：記錄每個 Schema、其導入的其他 Schema 以及產物的 mtime，均未變更的文件直接跳過
+CACHE_MANIFEST = GODOT_OUTPUT_DIR / ".codegen_cache.json"
+
+# 生成器版本：修改 generate_class_code 的輸出格式時務必遞增，以使舊緩存失效
+GENERATOR_VERSION = "5"
+
+# --- 延遲導入 (Lazy Imports) ---
+
+_pydantic_loaded = False
+
+def _ensure_pydantic():
+    """按需導入 pydantic 並綁定為模塊全局名稱"""
+    global BaseModel, _pydantic_loaded
+    if _pydantic_loaded:
+        return
+    from pydantic import BaseModel
+    _pydantic_loaded = True
+
+def _is_pydantic_model(obj) -> bool:
+    """obj 是否為 Pydantic 模型類 (調用前須已經過 _ensure_pydantic)"""
+    return isinstance(obj, type) and issubclass(obj, BaseModel)
+
 # --- 統計類 (Statistics) ---
 class ConversionStats:
     def __init__(self):
@@ -25,12 +59,13 @@ class ConversionStats:
         self.files_success = 0
         self.files_failed = 0
         self.files_skipped = 0 # 沒有模型的空文件
+        self.files_cached = 0 # 未變更而跳過生成的文件
         self.models_found = 0
-        self.errors: typing.List[str] = []
+        self.errors: collections.deque[typing.Tuple[str, str]] = collections.deque() # (文件名, 錯誤信息)，打印時才格式化
 
     def log_error(self, file: Path, msg: str):
         self.files_failed += 1
-        self.errors.append(f"[FAIL] {file.name}: {msg}")
+        self.errors.append((file.name, msg))
 
     def print_report(self):
         duration = time.time() - self.start_time
@@ -40,6 +75,7 @@ class ConversionStats:
         print(f" ⏱️  Duration      : {duration:.2f}s")
         print(f" 📂 Files Scanned : {self.files_scanned}")
         print(f" ✅ Files Success : {self.files_success}")
+        print(f" ♻️  Files Cached  : {self.files_cached} (Unchanged)")
         print(f" ⚠️  Files Skipped : {self.files_skipped} (No models found)")
         print(f" ❌ Files Failed  : {self.files_failed}")
         print(f" 📦 Models Found  : {self.models_found}")
@@ -47,8 +83,8 @@ class ConversionStats:
         
         if self.errors:
             print(" 🛑 ERROR DETAILS:")
-            for err in self.errors:
-                print(f"    {err}")
+            for file_name, msg in self.errors:
+                print(f"    [FAIL] {file_name}: {msg}")
         else:
             print(" 🎉 All systems operational. No errors detected.")
         print("="*50 + "\n")
@@ -64,182 +100,569 @@ TYPE_MAP = {
     list: "Array",
 }
 
-def get_gd_type(py_type) -> str:
-    """將 Python 類型映射為 Godot 強類型"""
-    # 處理 Optional[T] -> Variant
-    if typing.get_origin(py_type) is typing.Union and type(None) in typing.get_args(py_type):
-        return "Variant"
-        
+_NONE_TYPE = type(None)
+
+def _optional_inner(origin, args):
+    """Optional[T] / T | None -> T；其他類型返回 None"""
+    if (origin is typing.Union or origin is types.UnionType) and len(args) == 2:
+        if args[1] is _NONE_TYPE:
+            return args[0]
+        if args[0] is _NONE_TYPE:
+            return args[1]
+    return None
+
+def _resolve_gd_type(py_type) -> str:
+    """將 Python 類型映射為 Godot 強類型 (未緩存的實現)"""
+    _ensure_pydantic()
     origin = typing.get_origin(py_type)
     args = typing.get_args(py_type)
 
+    # 處理 Optional[T]：對象類型 (Model) 在 GDScript 中可為 null，保留強類型；
+    # 基礎類型與 Array/Dictionary 不可為 null，仍退化為 Variant
+    inner = _optional_inner(origin, args)
+    if inner is not None:
+        if _is_pydantic_model(inner):
+            return get_gd_type(inner)
+        return "Variant"
+
     if origin is list:
         inner_type = get_gd_type(args[0])
         return f"Array[{inner_type}]"
     
-    if isinstance(py_type, type) and issubclass(py_type, BaseModel):
+    if _is_pydantic_model(py_type):
         return f"{py_type.__name__}Data"
 
     return TYPE_MAP.get(py_type, "Variant")
 
+# 註解在各模型間大量重複 (int/str/List[int]/共享的嵌套模型)，按註解緩存映射結果
+_cached_gd_type = functools.lru_cache(maxsize=1024)(_resolve_gd_type)
+
+def get_gd_type(py_type) -> str:
+    """將 Python 類型映射為 Godot 強類型"""
+    try:
+        return _cached_gd_type(py_type)
+    except TypeError:
+        # 不可哈希的註解無法入緩存，直接計算
+        return _resolve_gd_type(py_type)
+
+# GDScript 字符串字面量轉義表 (str.translate 在 C 層單次遍歷完成)
+_GDSCRIPT_ESCAPE = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+# 默認值字面量生成器：按 type(val) 直接分派，取代逐個 isinstance 判斷
+_DEFAULT_EMITTERS = {
+    bool: lambda v: " = true" if v else " = false",
+    str: lambda v: f' = "{v.translate(_GDSCRIPT_ESCAPE)}"',
+    int: lambda v: f" = {v}",
+    float: lambda v: f" = {v}",
+    list: lambda v: " = []",
+    dict: lambda v: " = {}",
+    type(None): lambda v: " = null",
+}
+
 def get_default_value_code(field: FieldInfo) -> str:
     """提取 Pydantic 默認值"""
     if field.is_required():
         return ""
     
     val = field.default
-    if val is None: return " = null"
-    if isinstance(val, bool): return " = true" if val else " = false"
-    if isinstance(val, str): return f' = "{val}"'
-    if isinstance(val, (int, float)): return f" = {val}"
-    if isinstance(val, list): return " = []"
-    if isinstance(val, dict): return " = {}"
-    return ""
+    emitter = _DEFAULT_EMITTERS.get(type(val))
+    if emitter is None:
+        # 子類 (如 IntEnum、str Enum) 沿 MRO 回退到最近的基礎類型
+        emitter = next((_DEFAULT_EMITTERS[t] for t in type(val).__mro__ if t in _DEFAULT_EMITTERS), None)
+    return emitter(val) if emitter else ""
 
-def generate_class_code(model_cls: typing.Type[BaseModel]) -> str:
-    """為單個 Pydantic 模型生成 GDScript 類代碼"""
-    class_name = f"{model_cls.__name__}Data"
-    # 定義表名規則：類名小寫 + s (例如 Weapon -> weapons)
-    # 如果未來需要自定義，可以讀取 model_cls.Config
-    table_name = model_cls.__name__.lower() + "s"
-    fields = model_cls.model_fields
-    
-    lines = []
-    lines.append(f"class_name {class_name}")
-    lines.append(f"extends RefCounted") 
-    lines.append("")
-    
-    # [新增] 生成常量 TABLE_NAME，方便上層 Manager 調用或統一管理
-    lines.append(f"const TABLE_NAME = \"{table_name}\"")
-    lines.append("")
+# --- GDScript 模板 (Templates) ---
+# 逐字段輸出的代碼片段，模塊加載時定義一次，生成時以 str.format 填充
+
+_VAR_DECL = "var {name}: {gd_type}{default}\n"
+
+# from_dict 字段表條目：[字段名, 類型標記, 嵌套類]，由基類 _apply_field 統一解析
+_FIELD_ENTRY = "\t[\"{name}\", \"{kind}\", {inner_cls}],\n"
+
+_TO_DICT_LIST_MODEL = (
+    "\tif {name} != null:\n"
+    "\t\tdata['{name}'] = []\n"
+    "\t\tfor item in {name}:\n"
+    "\t\t\tdata['{name}'].append(item.to_dict())\n"
+)
+
+_TO_DICT_MODEL = (
+    "\tif {name} != null:\n"
+    "\t\tdata['{name}'] = {name}.to_dict()\n"
+)
+
+_TO_DICT_BASIC = "\tdata['{name}'] = {name}\n"
+
+# 所有生成類的共同基類：以表驅動方式實現 from_dict 的字段解析，
+# 避免在每個生成文件中逐字段展開相同的解析代碼
+BASE_CLASS_NAME = "GeneratedDataBase"
+BASE_SCRIPT_PATH = GODOT_OUTPUT_DIR / "generated_data_base.gd"
+
+_BASE_SCRIPT = f"""# GENERATED CODE - DO NOT MODIFY BY HAND
+
+class_name {BASE_CLASS_NAME}
+extends RefCounted
+
+# 按字段表條目 [字段名, 類型標記, 嵌套類] 從字典中解析單個字段
+static func _apply_field(instance: Object, field: Array, data: Dictionary) -> void:
+\tvar key: String = field[0]
+\tif not data.has(key): return
+\tvar raw = data[key]
+\tmatch field[1]:
+\t\t"list_model":
+\t\t\tif raw is String: raw = JSON.parse_string(raw)
+\t\t\tif raw is Array:
+\t\t\t\tvar items: Array = instance.get(key)
+\t\t\t\titems.clear()
+\t\t\t\tfor item in raw:
+\t\t\t\t\titems.append(field[2].from_dict(item))
+\t\t"model":
+\t\t\tif raw is String: raw = JSON.parse_string(raw)
+\t\t\t_set_field(instance, key, field[2].from_dict(raw) if raw != null else null)
+\t\t"collection":
+\t\t\tif raw is String: raw = JSON.parse_string(raw)
+\t\t\t_set_field(instance, key, raw)
+\t\t_:
+\t\t\t_set_field(instance, key, raw)
+
+# set() 遇到無法轉換的類型時會靜默忽略，回讀校驗後報錯，與直接賦值時一樣可見
+static func _set_field(instance: Object, key: String, value) -> void:
+\tinstance.set(key, value)
+\tif instance.get(key) != value:
+\t\tpush_error("%s.%s: cannot assign value of type %s" % [instance.get_script().get_global_name(), key, type_string(typeof(value))])
+"""
+
+# --- 代碼生成 (Code Generation) ---
+
+class FieldDesc(typing.NamedTuple):
+    """單個字段的預計算描述，供各生成階段共用，避免重複調用 typing API"""
+    name: str
+    annotation: typing.Any
+    origin: typing.Any
+    args: tuple
+    is_model: bool          # 嵌套單個對象 Model
+    is_list_of_model: bool  # 嵌套列表 List[Model]
+    gd_type: str
+    default: str
+
+# 最近加載的 Schema 文件中可見的模型集合 (含從其他 Schema 導入的模型)，
+# 由 load_models_from_file 按文件替換，用於以集合查找代替逐字段的 issubclass
+_known_models: typing.FrozenSet[type] = frozenset()
+
+def _is_model_type(py_type) -> bool:
+    """判斷註解是否為 Pydantic 模型：先查已知模型集合，再排除基礎類型，最後才走 issubclass"""
+    try:
+        if py_type in _known_models:
+            return True
+        # 基礎類型直接排除，免去 MRO 遍歷
+        if py_type in TYPE_MAP:
+            return False
+    except TypeError:
+        pass
+    # 經模塊屬性訪問 (如 cw.Stat) 或單獨調用時不在集合內的模型，仍需回退檢查
+    return _is_pydantic_model(py_type)
+
+def _describe(name: str, py_type, default: str) -> FieldDesc:
+    """由字段名、類型註解與默認值代碼解析字段描述"""
+    origin = typing.get_origin(py_type)
+    args = typing.get_args(py_type)
+
+    # Optional[Model] 與 Model 生成相同的解析/序列化邏輯 (默認值仍為 null)
+    inner = _optional_inner(origin, args)
+    if inner is not None and _is_model_type(inner):
+        py_type, origin, args = inner, None, ()
+
+    is_model = _is_model_type(py_type)
+    is_list_of_model = origin is list and bool(args) and _is_model_type(args[0])
+    return FieldDesc(name, py_type, origin, args, is_model, is_list_of_model,
+                     get_gd_type(py_type), default)
+
+def describe_field(name: str, field: FieldInfo) -> FieldDesc:
+    """一次性解析字段的類型信息"""
+    _ensure_pydantic()
+    return _describe(name, field.annotation, get_default_value_code(field))
+
+def _emit_shape(field_descs: typing.List[FieldDesc]) -> typing.Tuple[str, str, bool]:
+    """
+    生成與類名無關的代碼片段
+    返回: (變量聲明 + _FIELDS 字段表, to_dict 函數, 是否包含 id 字段)
+    """
+    # 逐字段模板的 format 綁定方法，循環內不再重複屬性查找
+    fmt_var = _VAR_DECL.format
+    fmt_entry = _FIELD_ENTRY.format
+    fmt_to_list_model = _TO_DICT_LIST_MODEL.format
+    fmt_to_model = _TO_DICT_MODEL.format
+    fmt_to_basic = _TO_DICT_BASIC.format
+
+    buf = StringIO()
+    w = buf.write
 
     # 1. 變量聲明
-    for name, field in fields.items():
-        gd_type = get_gd_type(field.annotation)
-        default_val = get_default_value_code(field)
-        lines.append(f"var {name}: {gd_type}{default_val}")
+    for desc in field_descs:
+        w(fmt_var(name=desc.name, gd_type=desc.gd_type, default=desc.default))
     
-    lines.append("")
+    w("\n")
 
-    # 2. from_dict 解析函數 (Deserialize)
-    lines.append(f"static func from_dict(data: Dictionary) -> {class_name}:")
-    lines.append(f"\tvar instance = {class_name}.new()")
-    
-    for name, field in fields.items():
-        py_type = field.annotation
-        origin = typing.get_origin(py_type)
-        access_code = f"data['{name}']"
-        
+    # 2. from_dict 字段表 (Deserialize)
+    w("const _FIELDS = [\n")
+    for desc in field_descs:
         # 邏輯 A: 嵌套列表 List[Model]
-        if origin is list and isinstance(typing.get_args(py_type)[0], type) and issubclass(typing.get_args(py_type)[0], BaseModel):
-            inner_cls = f"{typing.get_args(py_type)[0].__name__}Data"
-            lines.append(f"\tif data.has('{name}'):")
-            lines.append(f"\t\tvar raw = {access_code}")
-            lines.append(f"\t\tif raw is String: raw = JSON.parse_string(raw)")
-            lines.append(f"\t\tif raw is Array:")
-            lines.append(f"\t\t\tinstance.{name} = []")
-            lines.append(f"\t\t\tfor item in raw:")
-            lines.append(f"\t\t\t\tinstance.{name}.append({inner_cls}.from_dict(item))")
+        if desc.is_list_of_model:
+            w(fmt_entry(name=desc.name, kind="list_model", inner_cls=f"{desc.args[0].__name__}Data"))
 
         # 邏輯 B: 嵌套單個對象 Model
-        elif isinstance(py_type, type) and issubclass(py_type, BaseModel):
-             inner_cls = f"{py_type.__name__}Data"
-             lines.append(f"\tif data.has('{name}'):")
-             lines.append(f"\t\tvar raw = {access_code}")
-             lines.append(f"\t\tif raw is String: raw = JSON.parse_string(raw)")
-             lines.append(f"\t\tinstance.{name} = {inner_cls}.from_dict(raw)")
+        elif desc.is_model:
+            w(fmt_entry(name=desc.name, kind="model", inner_cls=f"{desc.annotation.__name__}Data"))
 
         # 邏輯 C: 基礎集合 (List/Dict)
-        elif origin in (list, dict):
-             lines.append(f"\tif data.has('{name}'):")
-             lines.append(f"\t\tvar raw = {access_code}")
-             lines.append(f"\t\tif raw is String: instance.{name} = JSON.parse_string(raw)")
-             lines.append(f"\t\telse: instance.{name} = raw")
+        elif desc.origin in (list, dict):
+            w(fmt_entry(name=desc.name, kind="collection", inner_cls="null"))
 
         # 邏輯 D: 基礎類型
         else:
-            lines.append(f"\tif data.has('{name}'): instance.{name} = {access_code}")
-            
-    lines.append("\treturn instance")
-    lines.append("")
+            w(fmt_entry(name=desc.name, kind="basic", inner_cls="null"))
+    w("]\n")
+    w("\n")
+    declarations = buf.getvalue()
+
+    buf = StringIO()
+    w = buf.write
 
     # 3. to_dict 序列化函數 (Serialize)
-    lines.append(f"func to_dict() -> Dictionary:")
-    lines.append(f"\tvar data = {{}}")
+    w(f"func to_dict() -> Dictionary:\n")
+    w(f"\tvar data = {{}}\n")
     
-    for name, field in fields.items():
-        py_type = field.annotation
-        origin = typing.get_origin(py_type)
-        
+    for desc in field_descs:
         # 邏輯 A: 嵌套列表 List[Model]
-        if origin is list and isinstance(typing.get_args(py_type)[0], type) and issubclass(typing.get_args(py_type)[0], BaseModel):
-             lines.append(f"\tif {name} != null:")
-             lines.append(f"\t\tdata['{name}'] = []")
-             lines.append(f"\t\tfor item in {name}:")
-             lines.append(f"\t\t\tdata['{name}'].append(item.to_dict())")
+        if desc.is_list_of_model:
+            w(fmt_to_list_model(name=desc.name))
 
         # 邏輯 B: 嵌套單個對象 Model
-        elif isinstance(py_type, type) and issubclass(py_type, BaseModel):
-             lines.append(f"\tif {name} != null:")
-             lines.append(f"\t\tdata['{name}'] = {name}.to_dict()")
+        elif desc.is_model:
+            w(fmt_to_model(name=desc.name))
              
         # 邏輯 C: 基礎類型
         else:
-             lines.append(f"\tdata['{name}'] = {name}")
+            w(fmt_to_basic(name=desc.name))
              
-    lines.append(f"\treturn data")
-    lines.append("")
+    w(f"\treturn data\n")
+    w("\n")
+
+    has_id = any(desc.name == "id" for desc in field_descs)
+    return declarations, buf.getvalue(), has_id
+
+@functools.lru_cache(maxsize=2048)
+def _emit_for_shape(shape: typing.Tuple[typing.Tuple[str, typing.Any, str], ...]) -> typing.Tuple[str, str, bool]:
+    """
+    按模型「形狀」(字段名, 類型註解, 默認值代碼) 緩存生成結果，形狀相同的模型直接複用
+    嵌套模型的判斷結果只取決於註解本身 (_known_models 僅為快速路徑)，因此無需納入緩存鍵
+    """
+    return _emit_shape([_describe(name, py_type, default) for name, py_type, default in shape])
+
+def generate_class_code(model_cls: typing.Type[BaseModel]) -> str:
+    """為單個 Pydantic 模型生成 GDScript 類代碼"""
+    _ensure_pydantic()
+    class_name = f"{model_cls.__name__}Data"
+    # 定義表名規則：類名小寫 + s (例如 Weapon -> weapons)
+    # 如果未來需要自定義，可以讀取 model_cls.Config
+    table_name = model_cls.__name__.lower() + "s"
+    fields = model_cls.model_fields
+
+    shape = tuple((name, field.annotation, get_default_value_code(field)) for name, field in fields.items())
+    try:
+        declarations, to_dict_code, has_id = _emit_for_shape(shape)
+    except TypeError:
+        # 含不可哈希註解的模型無法入緩存，直接生成
+        declarations, to_dict_code, has_id = _emit_shape(
+            [describe_field(name, field) for name, field in fields.items()]
+        )
+    
+    buf = StringIO()
+    w = buf.write
+    w(f"class_name {class_name}\n")
+    w(f"extends {BASE_CLASS_NAME}\n")
+    w("\n")
+    
+    # [新增] 生成常量 TABLE_NAME，方便上層 Manager 調用或統一管理
+    w(f"const TABLE_NAME = \"{table_name}\"\n")
+    w("\n")
+
+    w(declarations)
+
+    w(f"static func from_dict(data: Dictionary) -> {class_name}:\n")
+    w(f"\tvar instance = {class_name}.new()\n")
+    w("\tfor field in _FIELDS:\n")
+    w("\t\t_apply_field(instance, field, data)\n")
+    w("\treturn instance\n")
+    w("\n")
+
+    w(to_dict_code)
     
     # 4. SQLite Helper (如果有 id 字段)
-    if 'id' in fields:
+    if has_id:
         # [更新] 使用 TABLE_NAME 常量而不是硬編碼字符串
-        lines.append(f"# SQLite Helper")
-        lines.append(f"static func get_by_id(db: SQLite, id: String) -> {class_name}:")
-        lines.append(f"\tvar result = db.select_rows(TABLE_NAME, \"id = '\" + id + \"'\", [\"*\"])")
-        lines.append(f"\tif result.is_empty(): return null")
-        lines.append(f"\treturn from_dict(result[0])")
+        w(f"# SQLite Helper\n")
+        w(f"static func get_by_id(db: SQLite, id: String) -> {class_name}:\n")
+        w(f"\tvar result = db.select_rows(TABLE_NAME, \"id = '\" + id + \"'\", [\"*\"])\n")
+        w(f"\tif result.is_empty(): return null\n")
+        w(f"\treturn from_dict(result[0])\n")
+
+    return buf.getvalue()
+
+# --- 增量緩存 (Incremental Cache) ---
+
+def load_cache() -> typing.Dict[str, dict]:
+    """讀取緩存清單；生成器版本不一致或文件損壞時視為空緩存"""
+    try:
+        with open(CACHE_MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get("generator_version") != GENERATOR_VERSION:
+        return {}
+    return manifest.get("files", {})
 
-    return "\n".join(lines)
+def _schema_module_files(parts: typing.Sequence[str]) -> typing.List[Path]:
+    """將點分模塊路徑解析為 Schema 目錄下的文件 (含沿途包的 __init__.py)，不存在則忽略"""
+    files = []
+    for i in range(1, len(parts) + 1):
+        init_file = SCHEMA_SOURCE_DIR.joinpath(*parts[:i], "__init__.py")
+        if init_file.is_file():
+            files.append(init_file)
+    module_file = SCHEMA_SOURCE_DIR.joinpath(*parts[:-1], parts[-1] + ".py")
+    if module_file.is_file():
+        files.append(module_file)
+    return files
+
+def _direct_schema_imports(file_path: Path) -> typing.List[Path]:
+    """靜態解析文件中的 import 語句，返回其直接導入的 Schema 文件"""
+    try:
+        tree = ast.parse(file_path.read_bytes(), filename=str(file_path))
+    except (OSError, SyntaxError, ValueError):
+        return []
+
+    package_parts = file_path.relative_to(SCHEMA_SOURCE_DIR).parent.parts
+    imported: typing.List[Path] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported += _schema_module_files(alias.name.split("."))
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # 相對導入：level=1 為當前包，每多一級上溯一層
+                if node.level - 1 > len(package_parts):
+                    continue
+                base = list(package_parts[:len(package_parts) - node.level + 1])
+            else:
+                base = []
+            module_parts = base + (node.module.split(".") if node.module else [])
+            if module_parts:
+                imported += _schema_module_files(module_parts)
+            # `from pkg import submodule` 形式導入的子模塊
+            for alias in node.names:
+                imported += _schema_module_files(module_parts + [alias.name])
+    return imported
+
+def schema_dependencies(file_path: Path) -> typing.Dict[str, float]:
+    """
+    收集文件 (遞歸) 導入的其他 Schema 文件及其 mtime，例如被繼承的基類、類型別名所在的模塊
+    依據靜態 import 語句計算，結果只取決於源碼本身
+    """
+    own_file = file_path.resolve()
+    deps: typing.Dict[str, float] = {}
+    queue = [file_path]
+    while queue:
+        for dep in _direct_schema_imports(queue.pop()):
+            key = dep.relative_to(SCHEMA_SOURCE_DIR).as_posix()
+            if key in deps or dep.resolve() == own_file:
+                continue
+            deps[key] = dep.stat().st_mtime
+            queue.append(dep)
+    return deps
+
+def dependencies_unchanged(deps: typing.Dict[str, float]) -> bool:
+    """依賴的 Schema 文件均存在且 mtime 未變"""
+    for rel_path, mtime in deps.items():
+        try:
+            if (SCHEMA_SOURCE_DIR / rel_path).stat().st_mtime != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+def save_cache(entries: typing.Dict[str, dict]):
+    """寫回緩存清單"""
+    CACHE_MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    manifest = {"generator_version": GENERATOR_VERSION, "files": entries}
+    with open(CACHE_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
 
 # --- 文件掃描與處理 (File Scanning & Processing) ---
 
+def schema_module_name(file_path: Path) -> str:
+    """
+    Schema 文件對應的模塊名，與 sys.path 上的導入路徑一致 (例如 combat/weapon.py -> combat.weapon)，
+    使其他 Schema 的 `from combat.weapon import ...` 與此處共享同一模塊
+    """
+    return ".".join(file_path.relative_to(SCHEMA_SOURCE_DIR).with_suffix("").parts)
+
 def load_models_from_file(file_path: Path) -> typing.Tuple[typing.List[typing.Type[BaseModel]], str | None]:
     """
     動態加載 Python 文件並提取其中定義的 Pydantic 模型
     返回: (模型列表, 錯誤信息)
     """
-    module_name = file_path.stem
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    if not spec or not spec.loader:
-        return [], "Could not create module spec"
-    
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module
-    
-    try:
-        spec.loader.exec_module(module)
-    except Exception as e:
-        return [], str(e)
+    global _known_models
+    _ensure_pydantic()
+    module_name = schema_module_name(file_path)
+
+    module = sys.modules.get(module_name)
+    cached_file = getattr(module, "__file__", None)
+    if not (cached_file and Path(cached_file).resolve() == file_path.resolve()):
+        # SourceFileLoader 會透明地讀寫 __pycache__/*.pyc，熱啟動時跳過解析與編譯
+        spec = importlib.util.spec_from_file_location(module_name, file_path)
+        if not spec or not spec.loader:
+            return [], "Could not create module spec"
+        
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            sys.modules.pop(module_name, None)
+            return [], str(e)
     
     models = []
-    for name, obj in inspect.getmembers(module):
-        if inspect.isclass(obj) and issubclass(obj, BaseModel) and obj is not BaseModel:
+    visible_models = set()
+    # 直接遍歷模塊 __dict__，避免 inspect.getmembers 的全量求值與排序
+    for name, obj in vars(module).items():
+        if _is_pydantic_model(obj) and obj is not BaseModel:
+            visible_models.add(obj)
             if obj.__module__ == module_name: 
                 models.append(obj)
+    _known_models = frozenset(visible_models)
     
     return models, None
 
+def _pool_context():
+    """
+    進程池啟動方式：Linux 上使用 fork，子進程以寫時複製繼承父進程已導入的 pydantic；
+    其餘平台 (Windows 僅支持 spawn，macOS 上 fork 不安全) 沿用默認方式，由 _init_worker 每個進程預加載一次
+    """
+    if sys.platform.startswith("linux") and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+def _init_worker(schema_root: str):
+    """子進程初始化：spawn 模式下不會繼承父進程的 sys.path，並在此預加載 pydantic"""
+    if schema_root not in sys.path:
+        sys.path.insert(0, schema_root)
+    _ensure_pydantic()
+    # 緩存由子進程填充；fork 會繼承父進程的緩存內容，在此清空以免沿用舊 Schema 的映射結果
+    _cached_gd_type.cache_clear()
+    _emit_for_shape.cache_clear()
+
+# 每處理若干文件主動觸發一次完整 GC (模型類之間存在循環引用，引用計數無法回收)
+GC_INTERVAL = 50
+_files_since_gc = 0
+
+def _process_one(file_path: Path) -> typing.Tuple[Path, str | None, int, str | None, dict | None]:
+    """
+    單文件工作單元 (在子進程中執行)：加載模型並生成代碼，寫入由主進程統一完成
+    處理完畢後從 sys.modules 移除該模塊，使模型類可被回收，限制峰值內存
+    返回: (相對路徑, 錯誤信息, 模型數量, 生成內容, 緩存條目)
+    """
+    global _files_since_gc
+    module_name = schema_module_name(file_path)
+    # 已被其他 Schema 導入的模塊仍有依賴者，保留在 sys.modules 中
+    preloaded = module_name in sys.modules
+    try:
+        return _generate_file(file_path)
+    finally:
+        if not preloaded:
+            sys.modules.pop(module_name, None)
+        _files_since_gc += 1
+        if _files_since_gc >= GC_INTERVAL:
+            _files_since_gc = 0
+            gc.collect()
+
+def _generate_file(file_path: Path) -> typing.Tuple[Path, str | None, int, str | None, dict | None]:
+    """加載單個 Schema 文件並生成其 GDScript 內容，返回值同 _process_one"""
+    relative_path = file_path.relative_to(SCHEMA_SOURCE_DIR)
+    src_mtime = file_path.stat().st_mtime
+
+    # 提取模型
+    models, error = load_models_from_file(file_path)
+
+    if error:
+        return relative_path, error, 0, None, None
+
+    if not models:
+        return relative_path, None, 0, None, None
+
+    # 生成代碼
+    try:
+        output = "# GENERATED CODE - DO NOT MODIFY BY HAND\n\n" + "\n".join(
+            generate_class_code(model) for model in models
+        )
+    except Exception as e:
+        return relative_path, f"Generation failed: {str(e)}", len(models), None, None
+
+    # out_mtime 在寫入後由主進程補上
+    entry = {
+        "src_mtime": src_mtime,
+        "deps": schema_dependencies(file_path),
+        "models": len(models),
+    }
+    return relative_path, None, len(models), output, entry
+
+def _write_output(item: typing.Tuple[Path, str]) -> typing.Tuple[float | None, str | None, bool]:
+    """
+    寫入單個 .gd 文件 (在線程池中執行，文件 I/O 會釋放 GIL)
+    內容與磁盤上一致時跳過寫入，保持 mtime 不變以免觸發 Godot 重新導入
+    返回: (寫入後的 mtime, 錯誤信息, 是否實際寫入)
+    """
+    target_path, content = item
+    # 統一以 LF 字節寫出，使產物與平台無關、可逐字節比較
+    data = content.encode("utf-8")
+    try:
+        if target_path.exists() and target_path.stat().st_size == len(data) \
+                and target_path.read_bytes() == data:
+            return target_path.stat().st_mtime, None, False
+
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        target_path.write_bytes(data)
+        return target_path.stat().st_mtime, None, True
+    except OSError as e:
+        return None, str(e), False
+
+def write_base_script():
+    """寫出共享基類腳本；內容未變時不觸碰文件，避免 Godot 重新導入"""
+    data = _BASE_SCRIPT.encode("utf-8")
+    if BASE_SCRIPT_PATH.exists() and BASE_SCRIPT_PATH.read_bytes() == data:
+        return
+    BASE_SCRIPT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    BASE_SCRIPT_PATH.write_bytes(data)
+
 def process_all_schemas():
     """主流程：遞歸掃描並生成"""
     stats = ConversionStats()
     
-    sys.path.insert(0, str(SCHEMA_SOURCE_DIR.resolve()))
+    schema_root = str(SCHEMA_SOURCE_DIR.resolve())
+    sys.path.insert(0, schema_root)
     
     if not SCHEMA_SOURCE_DIR.exists():
         print(f"❌ Source directory not found: {SCHEMA_SOURCE_DIR}")
         return
 
+    _ensure_pydantic()
+
     print(f"🔍 Scanning {SCHEMA_SOURCE_DIR} for schemas...")
+
+    cache = load_cache()
+    new_cache: typing.Dict[str, dict] = {}
+    pending: typing.List[Path] = []
     
     for file_path in SCHEMA_SOURCE_DIR.rglob("*.py"):
         if file_path.name == "__init__.py":
@@ -247,38 +670,65 @@ def process_all_schemas():
             
         stats.files_scanned += 1
         relative_path = file_path.relative_to(SCHEMA_SOURCE_DIR)
-        
-        # 提取模型
-        models, error = load_models_from_file(file_path)
-        
-        if error:
-            stats.log_error(relative_path, error)
-            continue
-            
-        if not models:
-            stats.files_skipped += 1
-            continue
-            
-        stats.models_found += len(models)
-        
-        # 生成代碼
-        try:
-            gd_content = ["# GENERATED CODE - DO NOT MODIFY BY HAND", ""]
-            for model in models:
-                gd_content.append(generate_class_code(model))
-                gd_content.append("")
-                
-            target_path = GODOT_OUTPUT_DIR / relative_path.with_suffix(".gd")
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(target_path, "w", encoding="utf-8") as f:
-                f.write("\n".join(gd_content))
-            
+        target_path = GODOT_OUTPUT_DIR / relative_path.with_suffix(".gd")
+        cache_key = relative_path.as_posix()
+
+        # 命中緩存：源文件、其導入的其他 Schema 與產物均未變更，跳過加載與生成
+        entry = cache.get(cache_key)
+        if (entry and target_path.exists()
+                and entry["src_mtime"] == file_path.stat().st_mtime
+                and entry["out_mtime"] == target_path.stat().st_mtime
+                and dependencies_unchanged(entry["deps"])):
+            new_cache[cache_key] = entry
             stats.files_success += 1
-            print(f"  ✅ Generated: {target_path}")
-            
-        except Exception as e:
-            stats.log_error(relative_path, f"Generation failed: {str(e)}")
+            stats.files_cached += 1
+            stats.models_found += entry.get("models", 0)
+            continue
+
+        pending.append(file_path)
+
+    # 待寫入的產物：(相對路徑, 目標路徑, 生成內容, 緩存條目)
+    outputs: typing.List[typing.Tuple[Path, Path, str, dict]] = []
+
+    # 各文件相互獨立，分發到多進程並行處理 (exec_module 持有導入鎖，線程無法並行)
+    if pending:
+        with ProcessPoolExecutor(mp_context=_pool_context(), initializer=_init_worker, initargs=(schema_root,)) as ex:
+            for relative_path, error, models_count, output, entry in ex.map(_process_one, pending):
+                stats.models_found += models_count
+
+                if error:
+                    stats.log_error(relative_path, error)
+                    continue
+
+                if not models_count:
+                    stats.files_skipped += 1
+                    continue
+
+                target_path = GODOT_OUTPUT_DIR / relative_path.with_suffix(".gd")
+                outputs.append((relative_path, target_path, output, entry))
+
+    # 生成全部完成後統一落盤，I/O 不再與代碼生成交錯
+    write_base_script()
+    # 逐文件日誌先緩存，最後一次性輸出，避免每個文件一次 stdout 寫入
+    log_lines: typing.List[str] = []
+    if outputs:
+        with ThreadPoolExecutor(max_workers=8) as ex:
+            results = ex.map(_write_output, [(target, content) for _, target, content, _ in outputs])
+            for (relative_path, target_path, _, entry), (out_mtime, error, written) in zip(outputs, results):
+                if error:
+                    stats.log_error(relative_path, f"Write failed: {error}")
+                    continue
+
+                entry["out_mtime"] = out_mtime
+                new_cache[relative_path.as_posix()] = entry
+                stats.files_success += 1
+                if written:
+                    log_lines.append(f"  ✅ Generated: {target_path}\n")
+                else:
+                    log_lines.append(f"  ♻️  Unchanged: {target_path}\n")
+
+    save_cache(new_cache)
+    sys.stdout.writelines(log_lines)
 
     # 打印最終報告
     stats.print_report()